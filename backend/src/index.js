@@ -1,112 +1,48 @@
-import express from 'express';
-import cors from 'cors';
-import apiRouter from './routes/api.js';
-import { config, getServerConfig, getRuntimeConfig, getDatabaseConfig, getLlmConfig, getRagConfig, validateConfig } from './config.js';
+import cluster from 'cluster';
 import dotenv from 'dotenv';
-import { initializeLLM } from './llm/index.js';
-import { initializeIngest } from './rag/index.js';
-import db from './db/index.js';
-import { attachRequestContext, createRateLimiter } from './middleware/hardening.js';
+import { getServerConfig } from './config.js';
 
 dotenv.config();
 
-const app = express();
 const serverConfig = getServerConfig();
 const PORT = serverConfig.port;
 
-app.use(cors());
-app.use(attachRequestContext);
-app.use(createRateLimiter());
-app.use(express.json({ limit: '2mb' }));
-app.use((req, res, next) => {
-  const startedAt = Date.now();
-  res.on('finish', () => {
-    const durationMs = Date.now() - startedAt;
-    console.log(
-      `[${req.requestId}] ${req.method} ${req.originalUrl} -> ${res.statusCode} (${durationMs}ms)`,
-    );
-  });
-  next();
-});
-
-app.use('/api', apiRouter);
-
-app.get('/', (req, res) => {
-  res.send('EM TaskFlow AI is running.');
-});
+// Workers that die this soon after forking are treated as startup failures, not restarted
+const WORKER_MIN_UPTIME_MS = 10000;
 
-async function startServer() {
-  try {
-    console.log('🔍 Validating configuration...');
-    validateConfig();
-
-    try {
-      await db.initialize();
-      console.log('✅ Database service initialized at startup');
-    } catch (e) {
-      console.warn('⚠️ Database initialization failed:', e);
-    }
-
-    try {
-      await initializeLLM();
-      console.log('✅ LLM clients initialized at startup');
-    } catch (e) {
-      console.warn('⚠️ LLM client initialization failed:', e);
-    }
-
-    try {
-      await initializeIngest();
-      console.log('✅ RAG ingest pipeline initialized at startup');
-    } catch (e) {
-      console.warn('⚠️ RAG ingest initialization failed:', e);
-    }
+function startWorkers(count) {
+  console.log(`🧵 Starting ${count} server workers on port ${PORT}`);
+  const forkedAt = new Map();
+  const fork = () => {
+    const worker = cluster.fork();
+    forkedAt.set(worker.id, Date.now());
+  };
 
-    const runtimeConfig = getRuntimeConfig();
-    if (runtimeConfig.mode === 'full') {
-      try {
-        const { initializeMCP } = await import('./mcp/index.js');
-        await initializeMCP();
-        console.log('✅ MCP Service initialized at startup');
-      } catch (e) {
-        console.warn('⚠️ MCP Service init at startup failed:', e);
-      }
+  for (let i = 0; i < count; i += 1) {
+    fork();
+  }
 
-      try {
-        const { default: langGraphAgentService } = await import('./agent/index.js');
-        await langGraphAgentService.initialize();
-        console.log('✅ LangGraph Agent Service initialized successfully');
-      } catch (agentError) {
-        console.warn('⚠️ LangGraph Agent Service initialization failed, will retry on first use:', agentError);
+  cluster.on('exit', (worker, code, signal) => {
+    const uptime = Date.now() - (forkedAt.get(worker.id) || 0);
+    forkedAt.delete(worker.id);
+    if (worker.exitedAfterDisconnect) return;
+    if (uptime < WORKER_MIN_UPTIME_MS) {
+      console.error(`❌ Worker ${worker.process.pid} exited during startup (${signal || code}), not restarting`);
+      if (Object.keys(cluster.workers).length === 0) {
+        console.error('❌ No server workers left, exiting');
+        process.exit(1);
       }
-    } else {
-      console.log('ℹ️ Runtime mode is rag_only, skipping MCP and agent initialization');
+      return;
     }
-
-    const databaseConfig = getDatabaseConfig();
-    const llmConfig = getLlmConfig();
-    const ragConfig = getRagConfig();
-
-    app.listen(PORT, serverConfig.host, () => {
-      console.log(`🚀 EM TaskFlow AI server listening on ${serverConfig.host}:${PORT}`);
-      console.log(`📊 Environment: ${config.env}`);
-      console.log(`🧭 Runtime mode: ${runtimeConfig.mode}`);
-      console.log(`💾 Database: ${databaseConfig.url}`);
-      console.log(`🤖 LLM Provider: ${llmConfig.defaultProvider}`);
-      console.log(`🔍 RAG Enabled: ${ragConfig.enabled}`);
-      console.log(`🔗 Health check: http://${serverConfig.host}:${PORT}/api/health`);
-      console.log(`💬 Query API: POST http://${serverConfig.host}:${PORT}/api/query`);
-    });
-  } catch (error) {
-    console.error('Failed to initialize services:', error);
-    process.exit(1);
-  }
+    console.warn(`⚠️ Worker ${worker.process.pid} exited (${signal || code}), restarting`);
+    fork();
+  });
 }
 
-process.on('SIGINT', () => {
-  console.log('\nShutting down gracefully...');
-  db.close();
-  console.log('✅ Services shut down successfully');
-  process.exit(0);
-});
-
-startServer();
+// The primary only supervises workers; the app graph loads in processes that serve requests
+if (serverConfig.workers > 1 && cluster.isPrimary) {
+  startWorkers(serverConfig.workers);
+} else {
+  const { startServer } = await import('./server.js');
+  startServer();
+}
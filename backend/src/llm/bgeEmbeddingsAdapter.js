@@ -5,6 +5,7 @@
 
 import { Embeddings } from '@langchain/core/embeddings';
 import { getBgeEmbeddings } from './index.js';
+import { getRagConfig } from '../config.js';
 
 /**
  * LangChain embeddings adapter for Qwen3-VL embeddings microservice
@@ -26,8 +27,9 @@ export class BGEEmbeddingsAdapter extends Embeddings {
         throw new Error('Qwen3-VL embeddings service not available');
       }
 
-      // Use Qwen3-VL service to embed documents
-      const result = await this.bgeClient.embed(texts, true); // normalize=true
+      // Use Qwen3-VL service to embed documents in bounded micro-batches
+      const batchSize = getRagConfig().embedBatchSize || 32;
+      const result = await this.bgeClient.batchEmbed(texts, batchSize, true); // normalize=true
       
       // Extract embeddings from result
       if (result && Array.isArray(result.embeddings)) {
@@ -47,8 +49,7 @@ export class BGEEmbeddingsAdapter extends Embeddings {
    */
   async embedQuery(text) {
     try {
-      const embeddings = await this.embedDocuments([text]);
-      return embeddings[0];
+      return await this.bgeClient.embedQuery(text, true); // normalize=true
     } catch (error) {
       console.error('❌ Qwen3-VL query embedding failed:', error);
       throw error;
@@ -1,18 +1,94 @@
+import crypto from 'crypto';
+import os from 'os';
 import { pipeline } from '@huggingface/transformers';
+import { getRagConfig, getServerConfig } from '../config.js';
 
 const EMBEDDINGS_MODEL_ID = 'Xenova/multilingual-e5-large';
 
+// Bounded LRU for query embeddings; long texts are keyed by their SHA-256
+const QUERY_CACHE_MAX_ENTRIES = 1024;
+const QUERY_CACHE_HASH_THRESHOLD = 256;
+
+// Padded-token budget per forward pass; e5 truncates inputs at 512 tokens
+const EMBED_MAX_TOKENS = 512;
+const BATCH_TOKEN_BUDGET = 8192;
+
+// Cache-missing queries that arrive while a forward pass is running share the next one
+const QUERY_BATCH_MAX_SIZE = 32;
+
 let embeddingsPipelinePromise = null;
 
 async function getEmbeddingsPipeline() {
   if (!embeddingsPipelinePromise) {
+    const ragConfig = getRagConfig();
+    const workers = getServerConfig().workers || 1;
     embeddingsPipelinePromise = pipeline('feature-extraction', EMBEDDINGS_MODEL_ID, {
-      dtype: 'q4',
+      dtype: ragConfig.embeddingDtype || 'q4',
+      device: ragConfig.embeddingDevice || 'cpu',
+      // Split CPU cores between server workers instead of each using all of them
+      ...(workers > 1
+        ? { session_options: { intraOpNumThreads: Math.max(1, Math.floor(os.cpus().length / workers)) } }
+        : {}),
+    }).catch((error) => {
+      embeddingsPipelinePromise = null;
+      throw error;
     });
   }
   return embeddingsPipelinePromise;
 }
 
+function estimateTokens(text) {
+  // ~4 characters per token is close enough for batch sizing
+  return Math.min(EMBED_MAX_TOKENS, Math.ceil(String(text).length / 4) + 2);
+}
+
+/**
+ * Split length-sorted indices into batches bounded by count and padded-token budget
+ */
+function planBatches(order, texts, batchSize) {
+  const batches = [];
+  let current = [];
+  let longest = 0;
+
+  for (const index of order) {
+    const tokens = estimateTokens(texts[index]);
+    const padded = (current.length + 1) * Math.max(longest, tokens);
+    if (current.length > 0 && (current.length >= batchSize || padded > BATCH_TOKEN_BUDGET)) {
+      batches.push(current);
+      current = [];
+      longest = 0;
+    }
+    current.push(index);
+    longest = Math.max(longest, tokens);
+  }
+  if (current.length > 0) {
+    batches.push(current);
+  }
+
+  return batches;
+}
+
+/**
+ * Read [batch, dim] pooled output straight from the tensor's Float32Array
+ */
+function tensorRows(output) {
+  const [rows, dims] = output.dims.length === 2 ? output.dims : [1, output.dims[0]];
+  const data = output.data;
+  const result = new Array(rows);
+  for (let i = 0; i < rows; i += 1) {
+    result[i] = Array.from(data.subarray(i * dims, (i + 1) * dims));
+  }
+  return result;
+}
+
+function queryCacheKey(text, normalize) {
+  const value = String(text);
+  const key = value.length > QUERY_CACHE_HASH_THRESHOLD
+    ? crypto.createHash('sha256').update(value).digest('hex')
+    : value;
+  return `${normalize ? 'n' : 'r'}:${key}`;
+}
+
 /**
  * Client for Qwen3-VL Embeddings microservice
  * Provides high-quality multilingual embeddings via Qwen3-VL-Embedding-8B
@@ -22,6 +98,13 @@ export class BgeEmbeddingsClient {
     this.baseUrl = baseUrl;
     this.timeout = timeout;
     this.dimensions = null;
+    this.queryCache = new Map();
+    this.pendingQueries = new Map();
+    this.queryQueue = [];
+    this.queryDrainScheduled = false;
+    this.queryCacheHits = 0;
+    this.queryCacheMisses = 0;
+    this.queryCoalesced = 0;
   }
 
   /**
@@ -33,10 +116,7 @@ export class BgeEmbeddingsClient {
       const pipe = await getEmbeddingsPipeline();
       if (!this.dimensions) {
         const output = await pipe('healthcheck', { pooling: 'mean', normalize: true });
-        const list = output.tolist();
-        if (Array.isArray(list) && list.length > 0 && Array.isArray(list[0])) {
-          this.dimensions = list[0].length;
-        }
+        this.dimensions = output.dims?.[output.dims.length - 1] || this.dimensions;
       }
       const elapsed = (Date.now() - start) / 1000;
       return {
@@ -67,12 +147,11 @@ export class BgeEmbeddingsClient {
       const start = Date.now();
       const pipe = await getEmbeddingsPipeline();
       const output = await pipe(texts, { pooling: 'mean', normalize });
-      const list = output.tolist();
-      if (!Array.isArray(list) || list.length === 0) {
+      const list = tensorRows(output);
+      if (list.length === 0) {
         throw new Error('No embeddings returned from transformers.js pipeline');
       }
-      const dims = Array.isArray(list[0]) ? list[0].length : 0;
-      this.dimensions = dims || this.dimensions;
+      this.dimensions = list[0].length || this.dimensions;
       const elapsed = (Date.now() - start) / 1000;
       return {
         embeddings: list,
@@ -86,40 +165,122 @@ export class BgeEmbeddingsClient {
   }
 
   /**
-   * Batch embed with automatic chunking for large text arrays
+   * Embed a single query, serving repeated texts from the LRU cache
    */
-  async batchEmbed(texts, batchSize = 50, normalize = true) {
-    if (texts.length <= batchSize) {
-      const result = await this.embed(texts, normalize);
-      return {
-        embeddings: result.embeddings,
-        processing_time: result.processing_time,
-        batches_processed: 1,
-      };
+  async embedQuery(text, normalize = true) {
+    const key = queryCacheKey(text, normalize);
+    const cached = this.queryCache.get(key);
+    if (cached) {
+      // Re-insert to mark as most recently used
+      this.queryCache.delete(key);
+      this.queryCache.set(key, cached);
+      this.queryCacheHits++;
+      return cached.slice();
     }
 
-    console.log(`📦 Processing ${texts.length} texts in batches of ${batchSize}`);
-    
-    const allEmbeddings = [];
+    // Concurrent callers with the same query share one forward pass
+    const pending = this.pendingQueries.get(key);
+    if (pending) {
+      this.queryCoalesced++;
+      return (await pending).slice();
+    }
+
+    this.queryCacheMisses++;
+    const request = this.enqueueQueryEmbedding(text, normalize);
+    this.pendingQueries.set(key, request);
+
+    let embedding;
+    try {
+      embedding = await request;
+    } finally {
+      this.pendingQueries.delete(key);
+    }
+
+    this.queryCache.set(key, embedding);
+    if (this.queryCache.size > QUERY_CACHE_MAX_ENTRIES) {
+      this.queryCache.delete(this.queryCache.keys().next().value);
+    }
+
+    return embedding.slice();
+  }
+
+  /**
+   * Queue a query for the next merged pipeline call
+   */
+  enqueueQueryEmbedding(text, normalize) {
+    return new Promise((resolve, reject) => {
+      this.queryQueue.push({ text, normalize, resolve, reject });
+      if (!this.queryDrainScheduled) {
+        this.queryDrainScheduled = true;
+        setImmediate(() => this.drainQueryQueue());
+      }
+    });
+  }
+
+  /**
+   * Embed queued queries in merged batches until the queue is empty
+   */
+  async drainQueryQueue() {
+    while (this.queryQueue.length > 0) {
+      const batch = this.queryQueue.splice(0, QUERY_BATCH_MAX_SIZE);
+      for (const normalize of [true, false]) {
+        const group = batch.filter((entry) => entry.normalize === normalize);
+        if (group.length === 0) continue;
+        try {
+          const result = await this.embed(group.map((entry) => entry.text), normalize);
+          group.forEach((entry, index) => entry.resolve(result.embeddings[index]));
+        } catch (error) {
+          group.forEach((entry) => entry.reject(error));
+        }
+      }
+    }
+    this.queryDrainScheduled = false;
+  }
+
+  /**
+   * Get query embedding cache statistics
+   */
+  getQueryCacheInfo() {
+    return {
+      hits: this.queryCacheHits,
+      misses: this.queryCacheMisses,
+      coalesced: this.queryCoalesced,
+      size: this.queryCache.size,
+      maxSize: QUERY_CACHE_MAX_ENTRIES,
+    };
+  }
+
+  /**
+   * Batch embed in length-sorted micro-batches to keep padding and memory bounded
+   */
+  async batchEmbed(texts, batchSize = 32, normalize = true) {
+    // Group texts of similar length so each batch pads to a similar sequence length,
+    // and cap each batch's padded size so long chunks run in smaller batches
+    const order = texts
+      .map((text, index) => index)
+      .sort((a, b) => String(texts[b]).length - String(texts[a]).length);
+    const batches = planBatches(order, texts, batchSize);
+
+    if (batches.length > 1) {
+      console.log(`📦 Processing ${texts.length} texts in ${batches.length} batches (max ${batchSize})`);
+    }
+
+    const allEmbeddings = new Array(texts.length);
     let totalProcessingTime = 0;
     let batchesProcessed = 0;
 
-    for (let i = 0; i < texts.length; i += batchSize) {
-      const batch = texts.slice(i, i + batchSize);
-      console.log(`   Processing batch ${batchesProcessed + 1}/${Math.ceil(texts.length / batchSize)}...`);
-      
-      const result = await this.embed(batch, normalize);
-      allEmbeddings.push(...result.embeddings);
+    for (const indices of batches) {
+      const result = await this.embed(indices.map((index) => texts[index]), normalize);
+      indices.forEach((index, position) => {
+        allEmbeddings[index] = result.embeddings[position];
+      });
       totalProcessingTime += result.processing_time;
       batchesProcessed++;
-
-      // Small delay between batches to avoid overwhelming the service
-      if (i + batchSize < texts.length) {
-        await new Promise(resolve => setTimeout(resolve, 100));
-      }
     }
 
-    console.log(`✅ Completed ${batchesProcessed} batches in ${totalProcessingTime.toFixed(3)}s`);
+    if (batches.length > 1) {
+      console.log(`✅ Completed ${batchesProcessed} batches in ${totalProcessingTime.toFixed(3)}s`);
+    }
 
     return {
       embeddings: allEmbeddings,
@@ -151,6 +312,7 @@ export class BgeEmbeddingsClient {
         model: health.model_name,
         dimensions: health.dimensions,
         baseUrl: this.baseUrl,
+        queryCache: this.getQueryCacheInfo(),
       };
     } catch {
       return {
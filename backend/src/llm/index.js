@@ -3,8 +3,11 @@ import { ChatGoogleGenerativeAI } from "@langchain/google-genai";
 import { getLlmConfig } from '../config.js';
 import { bgeEmbeddingsClient } from './bgeEmbeddingsClient.js';
 
+const CHAT_MODEL_CACHE_MAX_ENTRIES = 8;
+
 let chatModel = null;
 let initialized = false;
+const chatModelCache = new Map();
 
 function createChatModelForProvider(providerKey, options = {}) {
   const llmConfig = getLlmConfig();
@@ -58,6 +61,31 @@ function createChatModelForProvider(providerKey, options = {}) {
   return model;
 }
 
+/**
+ * Get a shared chat model for a provider/model/temperature combination
+ */
+export function getChatModelForProvider(providerKey, options = {}) {
+  const llmConfig = getLlmConfig();
+  const provider = llmConfig.providers[providerKey];
+  const modelName = options.model || llmConfig.defaultModel;
+  const temperature = options.temperature ?? 0.1;
+  const key = [providerKey, modelName, temperature, provider?.baseUrl || ''].join('|');
+
+  const cached = chatModelCache.get(key);
+  if (cached) {
+    chatModelCache.delete(key);
+    chatModelCache.set(key, cached);
+    return cached;
+  }
+
+  const model = createChatModelForProvider(providerKey, { ...options, model: modelName, temperature });
+  chatModelCache.set(key, model);
+  if (chatModelCache.size > CHAT_MODEL_CACHE_MAX_ENTRIES) {
+    chatModelCache.delete(chatModelCache.keys().next().value);
+  }
+  return model;
+}
+
 /**
  * Initialize all LLM clients
  */
@@ -69,7 +97,7 @@ export async function initializeLLM() {
   const llmConfig = getLlmConfig();
   const providerKey = llmConfig.defaultProvider || 'openai';
 
-  chatModel = createChatModelForProvider(providerKey, {
+  chatModel = getChatModelForProvider(providerKey, {
     model: llmConfig.defaultModel,
     temperature: 0.1,
   });
@@ -111,6 +139,7 @@ export async function getLLMStatus() {
     initialized,
     chatModel: !!chatModel,
     bgeEmbeddings: false,
+    embeddingsQueryCache: bgeEmbeddingsClient.getQueryCacheInfo(),
   };
 
   try {
@@ -122,13 +151,13 @@ export async function getLLMStatus() {
 }
 
 /**
- * Create a new chat model instance with custom settings
+ * Get a chat model instance with custom settings (shared per provider/model/temperature)
  */
 export function createChatModelInstance(options) {
   const llmConfig = getLlmConfig();
   const providerKey = llmConfig.defaultProvider || 'openai';
 
-  return createChatModelForProvider(providerKey, options || {});
+  return getChatModelForProvider(providerKey, options || {});
 }
 
 /**
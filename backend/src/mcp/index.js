@@ -1,5 +1,5 @@
 import { config, getMcpConfig } from "../config.js";
-import { ChatOpenAI } from "@langchain/openai";
+import { getChatModelForProvider } from "../llm/index.js";
 
 let mcpTools = [];
 let jiraMcpTools = [];
@@ -53,12 +53,8 @@ export async function initializeMCP() {
     const openaiModelName = llmConfig.defaultModel || "gpt-4o-mini";
     if (openaiProvider.enabled && openaiProvider.apiKey) {
       try {
-        llm = new ChatOpenAI({
-          modelName: openaiModelName,
-          openAIApiKey: openaiProvider.apiKey,
-          configuration: {
-            baseURL: openaiProvider.baseUrl,
-          },
+        llm = getChatModelForProvider("openai", {
+          model: openaiModelName,
           temperature: 0.1,
         });
         console.log("✅ Using OpenAI for MCP tool calling");
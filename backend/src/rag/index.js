@@ -7,9 +7,11 @@
 export {
   initializeIngest,
   ingestPDF,
+  ingestPDFs,
   getIngestStatus,
   getVectorStore,
   getChromaClient,
+  getChromaCollection,
   clearCollection,
 } from './ingest.js';
 
@@ -22,10 +24,9 @@ export {
 } from './retriever.js';
 
 // Combined RAG service for backward compatibility
-import { initializeIngest, ingestPDF, getIngestStatus, getVectorStore } from './ingest.js';
+import { initializeIngest, ingestPDF, ingestPDFs, getIngestStatus, getVectorStore } from './ingest.js';
 import { baselineRetrieve, agenticRetrieve, simpleRetrieve, getRetrieverStatus } from './retriever.js';
-import { getChromaClient } from './ingest.js';
-import { getRagConfig } from '../config.js';
+import { getChromaClient, getChromaCollection, invalidateChromaCollection } from './ingest.js';
 
 /**
  * Legacy RAG service interface for backward compatibility
@@ -50,6 +51,11 @@ export class RAGService {
     return ingestPDF(filePath, filename);
   }
 
+  async processPDFs(files) {
+    await this.ensureInitialized();
+    return ingestPDFs(files);
+  }
+
   async listDocuments() {
     await this.ensureInitialized();
     const ingestStatus = await getIngestStatus();
@@ -59,12 +65,10 @@ export class RAGService {
     }
 
     try {
-      const client = getChromaClient();
-      const ragConfig = getRagConfig();
-      if (!client) {
+      if (!getChromaClient()) {
         return [];
       }
-      const col = await client.getCollection({ name: ragConfig.defaultCollection || 'pdf_chunks' });
+      const col = await getChromaCollection();
       const result = await col.get({
         include: ['metadatas'],
       });
@@ -93,6 +97,7 @@ export class RAGService {
 
       return Array.from(byFilename.values()).sort((a, b) => b.chunkCount - a.chunkCount);
     } catch (error) {
+      invalidateChromaCollection(error);
       return [];
     }
   }
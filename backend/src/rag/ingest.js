@@ -3,28 +3,31 @@
  * Handles document ingestion with token-aware chunking and vector storage
  */
 
-import { TokenTextSplitter } from 'langchain/text_splitter';
 import { Document } from 'langchain/document';
 import fs from 'fs/promises';
 import pdf from 'pdf-parse/lib/pdf-parse.js';
 import { ChromaClient } from 'chromadb';
 import { config, getRagConfig } from '../config.js';
 import { BGEEmbeddingsAdapter } from '../llm/bgeEmbeddingsAdapter.js';
+import { loadPdfChunks, simpleHash } from './pdfChunks.js';
+import { parsePdfInWorker, getPdfWorkerPoolSize } from './pdfWorkerPool.js';
 
 // Dependencies for injection
 let fsModule = fs;
 let pdfModule = pdf;
 let ChromaClientClass = ChromaClient;
-
-// Chunking configuration
-const CHUNK_SIZE = 800; // tokens
-const CHUNK_OVERLAP = 150; // tokens
+let pdfWorkersEnabled = true;
 
 // Singleton instances
 let vectorStore = null;
 let chromaClient = null;
+let collectionPromise = null;
+let maxBatchSizePromise = null;
 let initialized = false;
 
+// Write size used when the server's limit cannot be read
+const FALLBACK_MAX_BATCH_SIZE = 1000;
+
 /**
  * Initialize the ingestion pipeline
  */
@@ -47,8 +50,11 @@ export async function initializeIngest() {
     });
 
     const collectionName = ragConfig.defaultCollection || 'pdf_chunks';
+    collectionPromise = null;
+    maxBatchSizePromise = null;
 
     let embeddings;
+    let embeddingSource = 'fallback';
     const provider = (ragConfig.embeddingProvider || 'qwen3-vl').toLowerCase();
 
     if (provider === 'qwen3-vl' || provider === 'bge-m3' || provider === 'microservice' || provider === 'auto') {
@@ -58,6 +64,7 @@ export async function initializeIngest() {
         if (bgeAvailable) {
           console.log('✅ Using Qwen3-VL embeddings microservice for ingestion');
           embeddings = bgeAdapter;
+          embeddingSource = `microservice:${ragConfig.embeddingDtype || 'q4'}`;
         } else {
           throw new Error('Embeddings microservice not available');
         }
@@ -92,42 +99,82 @@ export async function initializeIngest() {
       };
     }
 
-    vectorStore = {
-      embeddings,
-      async addDocuments(documents) {
-        const collection = await chromaClient.getOrCreateCollection({
-          name: collectionName,
-          metadata: {
-            'hnsw:space': 'cosine',
-            'hnsw:construction_ef': 200,
-            'hnsw:M': 16,
-            'hnsw:search_ef': 100,
-          },
-        });
-        const texts = documents.map((doc) => String(doc.pageContent || ''));
-        const metadatas = documents.map((doc) => sanitizeMetadata(doc.metadata || {}));
-        const ids = documents.map((doc, index) =>
-          `${filenameSafeId(doc.metadata?.filename || 'doc')}-${doc.metadata?.chunkIndex ?? index}-${Date.now()}-${index}`,
-        );
-        const vectors = await embeddings.embedDocuments(texts);
-        await collection.upsert({
-          ids,
-          documents: texts,
-          metadatas,
-          embeddings: vectors,
-        });
-      },
-    };
+    vectorStore = createVectorStore(embeddings, embeddingSource);
 
     initialized = true;
     console.log(`✅ RAG ingest pipeline initialized: ${collectionName}`);
 
+    // Resolve the collection now so the first query doesn't pay the cold start
+    try {
+      const collection = await getChromaCollection();
+      const count = await collection.count();
+      console.log(`🔥 Chroma collection warmed: ${collectionName} (${count} chunks)`);
+    } catch (error) {
+      console.warn('⚠️ Chroma collection warmup failed, will resolve on first use:', error?.message || error);
+    }
+
   } catch (error) {
     console.error('❌ Failed to initialize RAG ingest pipeline:', error);
     throw error;
   }
 }
 
+/**
+ * Chroma-backed store that upserts chunks under stable ids, within the server's max batch size
+ */
+function createVectorStore(embeddings, embeddingSource) {
+  return {
+    embeddings,
+    async addDocuments(documents) {
+      const collection = await getChromaCollection();
+      const texts = documents.map((doc) => String(doc.pageContent || ''));
+      const metadatas = documents.map((doc, index) => sanitizeMetadata({
+        ...(doc.metadata || {}),
+        contentHash: doc.metadata?.contentHash || simpleHash(texts[index]),
+        embeddingSource,
+      }));
+      const ids = documents.map((doc, index) => chunkId(doc.metadata?.filename, doc.metadata?.chunkIndex ?? index));
+      const batchSize = await getMaxBatchSize();
+      try {
+        for (let start = 0; start < ids.length; start += batchSize) {
+          const end = start + batchSize;
+          const batchTexts = texts.slice(start, end);
+          const batchMetadatas = metadatas.slice(start, end);
+          const vectors = await embedWithReuse(collection, embeddings, batchTexts, batchMetadatas, embeddingSource);
+          await collection.upsert({
+            ids: ids.slice(start, end),
+            documents: batchTexts,
+            metadatas: batchMetadatas,
+            embeddings: vectors,
+          });
+        }
+      } catch (error) {
+        invalidateChromaCollection(error);
+        throw error;
+      }
+      await removeStaleChunks(collection, documents, ids);
+    },
+  };
+}
+
+/**
+ * Largest write ChromaDB accepts, looked up once per client
+ */
+async function getMaxBatchSize() {
+  if (!maxBatchSizePromise) {
+    maxBatchSizePromise = Promise.resolve()
+      .then(() => (typeof chromaClient?.getMaxBatchSize === 'function' ? chromaClient.getMaxBatchSize() : Infinity))
+      .then((size) => (Number.isInteger(size) && size > 0 ? size : Infinity))
+      .catch((error) => {
+        maxBatchSizePromise = null;
+        console.warn('⚠️ Chroma max batch size lookup failed, using a conservative default:', error?.message || error);
+        return FALLBACK_MAX_BATCH_SIZE;
+      });
+  }
+
+  return maxBatchSizePromise;
+}
+
 /**
  * Process PDF file into chunks and store in vector database
  */
@@ -137,36 +184,7 @@ export async function ingestPDF(filePath, filename) {
   try {
     console.log(`📄 Ingesting PDF: ${filename}`);
 
-    // Read and parse PDF
-    const dataBuffer = await fsModule.readFile(filePath);
-    const pdfData = await pdfModule(dataBuffer);
-    const text = pdfData.text;
-
-    if (!text || text.trim().length === 0) {
-      throw new Error('No text content found in PDF');
-    }
-
-    // Create chunks with token-aware splitting, with fallback if tokenization fails
-    let chunks;
-    try {
-      chunks = await createChunks(text, filename, filePath);
-    } catch (chunkError) {
-      console.warn('⚠️ Chunking failed, using fallback document chunk:', chunkError);
-      chunks = [
-        new Document({
-          pageContent: text,
-          metadata: {
-            filename,
-            source: filePath,
-            chunkIndex: 0,
-          },
-        }),
-      ];
-    }
-    
-    if (chunks.length === 0) {
-      throw new Error('No valid chunks created from PDF');
-    }
+    const chunks = await parsePdf(filePath, filename);
 
     // Store chunks in vector database
     if (vectorStore) {
@@ -190,82 +208,145 @@ export async function ingestPDF(filePath, filename) {
 }
 
 /**
- * Create chunks from text using token-aware splitting
+ * Process several PDF files concurrently and store all chunks in one write
  */
-async function createChunks(text, filename, filePath) {
-  console.log('🔪 Creating token-aware chunks...');
+export async function ingestPDFs(files) {
+  await ensureIngestReady();
 
-  // Use TokenTextSplitter for precise token control
-  const tokenSplitter = new TokenTextSplitter({
-    chunkSize: CHUNK_SIZE,
-    chunkOverlap: CHUNK_OVERLAP,
-  });
+  console.log(`📚 Ingesting ${files.length} PDFs${pdfWorkersEnabled ? ` (${getPdfWorkerPoolSize()} parser threads)` : ''}`);
 
-  // Use token splitter for most precise control
-  const chunks = await tokenSplitter.splitText(text);
-  
-  // Create documents with enhanced metadata
-  const documents = chunks.map((chunk, index) => new Document({
-    pageContent: chunk,
-    metadata: {
-      filename,
-      source: filePath,
-      chunkIndex: index,
-      chunkSize: chunk.length,
-      tokenCount: estimateTokens(chunk),
-      processingMethod: 'token_aware_recursive',
-      timestamp: new Date().toISOString(),
-      documentType: 'pdf',
-      chunkType: classifyChunkType(chunk),
-      // Add hash for deduplication
-      contentHash: simpleHash(chunk),
+  // Chunk ids derive from the filename, so a repeated name would collide in the shared upsert
+  const seenFilenames = new Set();
+  const allChunks = [];
+  const results = await Promise.all(files.map(async ({ filePath, filename }) => {
+    if (seenFilenames.has(filename)) {
+      return { filename, success: false, chunks: 0, error: 'Duplicate filename in batch' };
+    }
+    seenFilenames.add(filename);
+
+    try {
+      const chunks = await parsePdf(filePath, filename);
+      allChunks.push(...chunks);
+      return { filename, success: true, chunks: chunks.length };
+    } catch (error) {
+      console.error(`❌ PDF ingestion failed for ${filename}:`, error);
+      return { filename, success: false, chunks: 0, error: error.message };
     }
   }));
 
-  console.log(`📋 Created ${documents.length} chunks (avg ${Math.round(text.length / documents.length)} chars per chunk)`);
-  return documents;
+  if (vectorStore && allChunks.length > 0) {
+    try {
+      await vectorStore.addDocuments(allChunks);
+      console.log(`✅ Ingested ${allChunks.length} chunks from ${files.length} PDFs`);
+    } catch (error) {
+      console.error('❌ Failed to store ingested chunks:', error);
+      return results.map((result) => (result.success
+        ? { ...result, success: false, chunks: 0, error: error.message }
+        : result));
+    }
+  }
+
+  return results;
 }
 
 /**
- * Classify chunk type for better retrieval
+ * Parse a PDF into chunks, on a parser worker thread unless test doubles are injected
  */
-function classifyChunkType(chunk) {
-  const text = chunk.toLowerCase();
-  
-  if (text.includes('table') || text.includes('figure') || text.includes('chart')) {
-    return 'structured';
-  } else if (text.includes('conclusion') || text.includes('summary')) {
-    return 'summary';
-  } else if (text.includes('introduction') || text.includes('abstract')) {
-    return 'introduction';
-  } else if (text.match(/^\s*\d+\.\s/m)) {
-    return 'list';
-  } else if (text.includes('method') || text.includes('approach')) {
-    return 'methodology';
-  } else {
-    return 'content';
+async function parsePdf(filePath, filename) {
+  const pdfLoader = getRagConfig().pdfLoader || 'v1.10.100';
+  if (!pdfWorkersEnabled) {
+    return loadPdfChunks(filePath, filename, { fsModule, pdfModule, pdfLoader });
   }
+
+  const chunks = await parsePdfInWorker(filePath, filename, pdfLoader);
+  return chunks.map((chunk) => new Document(chunk));
 }
 
 /**
- * Estimate token count (rough approximation)
+ * Embed chunk texts, reusing vectors already stored for identical chunks
  */
-function estimateTokens(text) {
-  // Rough estimate: ~4 characters per token
-  return Math.ceil(text.length / 4);
+async function embedWithReuse(collection, embeddings, texts, metadatas, embeddingSource) {
+  const stored = new Map();
+  const hashes = [...new Set(metadatas.map((metadata) => metadata.contentHash))];
+
+  try {
+    const existing = await collection.get({
+      where: {
+        $and: [
+          { contentHash: { $in: hashes } },
+          { embeddingSource },
+        ],
+      },
+      include: ['documents', 'metadatas', 'embeddings'],
+    });
+    const existingDocs = Array.isArray(existing?.documents) ? existing.documents : [];
+    const existingMetadatas = Array.isArray(existing?.metadatas) ? existing.metadatas : [];
+    const existingEmbeddings = Array.isArray(existing?.embeddings) ? existing.embeddings : [];
+    existingDocs.forEach((text, index) => {
+      const hash = existingMetadatas[index]?.contentHash;
+      const vector = existingEmbeddings[index];
+      if (hash && typeof text === 'string' && vector) {
+        stored.set(`${hash}:${text}`, Array.from(vector));
+      }
+    });
+  } catch (error) {
+    console.warn('⚠️ Embedding reuse lookup failed, embedding all chunks:', error?.message || error);
+  }
+
+  const vectors = new Array(texts.length);
+  const missing = [];
+  texts.forEach((text, index) => {
+    const vector = stored.get(`${metadatas[index].contentHash}:${text}`);
+    if (vector) {
+      vectors[index] = vector;
+    } else {
+      missing.push(index);
+    }
+  });
+
+  if (missing.length > 0) {
+    const fresh = await embeddings.embedDocuments(missing.map((index) => texts[index]));
+    missing.forEach((index, position) => {
+      vectors[index] = fresh[position];
+    });
+  }
+
+  if (missing.length < texts.length) {
+    console.log(`♻️ Reused ${texts.length - missing.length}/${texts.length} stored chunk embeddings`);
+  }
+
+  return vectors;
 }
 
 /**
- * Simple hash function for content deduplication
+ * Delete chunks left over from a previous, longer version of the same files
  */
-function simpleHash(text) {
-  let hash = 0;
-  for (let i = 0; i < text.length; i++) {
-    const char = text.charCodeAt(i);
-    hash = ((hash << 5) - hash) + char;
-    hash = hash & hash; // Convert to 32-bit integer
+async function removeStaleChunks(collection, documents, ids) {
+  const filenames = [...new Set(documents.map((doc) => doc.metadata?.filename).filter(Boolean))];
+  if (filenames.length === 0) return;
+
+  try {
+    const existing = await collection.get({
+      where: { filename: { $in: filenames } },
+      include: [],
+    });
+    const current = new Set(ids);
+    const stale = (existing?.ids || []).filter((id) => !current.has(id));
+    if (stale.length > 0) {
+      await collection.delete({ ids: stale });
+      console.log(`🧹 Removed ${stale.length} stale chunks`);
+    }
+  } catch (error) {
+    console.warn('⚠️ Stale chunk cleanup failed:', error?.message || error);
   }
-  return Math.abs(hash).toString(16);
+}
+
+/**
+ * Stable chunk id so re-ingesting a file upserts over its previous chunks
+ */
+function chunkId(filename, chunkIndex) {
+  const name = String(filename || 'doc');
+  return `${filenameSafeId(name)}-${simpleHash(name)}-${chunkIndex}`;
 }
 
 function filenameSafeId(value) {
@@ -337,6 +418,65 @@ export function getChromaClient() {
   return chromaClient;
 }
 
+/**
+ * Get the RAG collection handle, resolving it from ChromaDB only once
+ */
+export async function getChromaCollection() {
+  if (!chromaClient) {
+    throw new Error('ChromaDB client not initialized');
+  }
+
+  if (!collectionPromise) {
+    const ragConfig = getRagConfig();
+    const searchEf = ragConfig.hnswSearchEf || 100;
+    collectionPromise = chromaClient.getOrCreateCollection({
+      name: ragConfig.defaultCollection || 'pdf_chunks',
+      metadata: {
+        'hnsw:space': 'cosine',
+        'hnsw:construction_ef': 200,
+        'hnsw:M': 16,
+        'hnsw:search_ef': searchEf,
+      },
+    }).then(async (collection) => {
+      await applySearchEf(collection, searchEf);
+      return collection;
+    }).catch((error) => {
+      collectionPromise = null;
+      throw error;
+    });
+  }
+
+  return collectionPromise;
+}
+
+/**
+ * Drop the memoised collection handle if ChromaDB reports the collection gone,
+ * e.g. after another process deleted or recreated it
+ */
+export function invalidateChromaCollection(error) {
+  if (isCollectionNotFound(error)) {
+    collectionPromise = null;
+  }
+}
+
+function isCollectionNotFound(error) {
+  if (!error) return false;
+  return error.name === 'ChromaNotFoundError' || /does not exist|not found/i.test(error.message || '');
+}
+
+/**
+ * Creation metadata is ignored for an existing collection, so push search_ef to the live one
+ */
+async function applySearchEf(collection, searchEf) {
+  if (collection.configuration?.hnsw?.ef_search === searchEf) return;
+
+  try {
+    await collection.modify({ configuration: { hnsw: { ef_search: searchEf } } });
+  } catch (error) {
+    console.warn('⚠️ Failed to apply HNSW search_ef to collection:', error?.message || error);
+  }
+}
+
 /**
  * Ensure ingest pipeline is ready
  */
@@ -359,6 +499,7 @@ export async function clearCollection() {
     const collectionName = ragConfig.defaultCollection || 'pdf_chunks';
     
     // Delete and recreate collection
+    collectionPromise = null;
     try {
       await chromaClient.deleteCollection({ name: collectionName });
     } catch (error) {
@@ -382,7 +523,12 @@ export async function clearCollection() {
 export const __test__ = {
   setFs: (mock) => { fsModule = mock; },
   setPdf: (mock) => { pdfModule = mock; },
+  setPdfWorkers: (enabled) => { pdfWorkersEnabled = enabled; },
   setChromaClientClass: (mock) => { ChromaClientClass = mock; },
+  setChromaClient: (mock) => { chromaClient = mock; collectionPromise = null; maxBatchSizePromise = null; },
   setVectorStore: (mock) => { vectorStore = mock; },
   getVectorStore: () => vectorStore,
+  createVectorStore,
+  embedWithReuse,
+  removeStaleChunks,
 };
@@ -0,0 +1,18 @@
+/**
+ * PDF parser worker - runs pdf.js parsing and chunking off the main event loop
+ */
+
+import { parentPort } from 'worker_threads';
+import { loadPdfChunks } from './pdfChunks.js';
+
+parentPort.on('message', async ({ id, filePath, filename, pdfLoader }) => {
+  try {
+    const chunks = await loadPdfChunks(filePath, filename, { pdfLoader });
+    parentPort.postMessage({
+      id,
+      chunks: chunks.map((chunk) => ({ pageContent: chunk.pageContent, metadata: chunk.metadata })),
+    });
+  } catch (error) {
+    parentPort.postMessage({ id, error: error?.message || String(error) });
+  }
+});
@@ -0,0 +1,123 @@
+/**
+ * Worker thread pool for PDF parsing
+ * pdf-parse runs pdf.js without its own worker, so parsing is CPU-bound on whichever thread calls it
+ */
+
+import os from 'os';
+import { Worker } from 'worker_threads';
+import { getServerConfig } from '../config.js';
+
+// Spare cores are shared between server workers, like the ONNX thread budget
+const POOL_SIZE = Math.max(1, Math.floor((os.cpus().length - 1) / (getServerConfig().workers || 1)));
+const WORKER_URL = new URL('./pdfWorker.js', import.meta.url);
+
+const idleWorkers = [];
+const queue = [];
+const tasks = new Map();
+let workerCount = 0;
+let nextTaskId = 0;
+
+/**
+ * Parse and chunk a PDF on a worker thread; resolves to plain {pageContent, metadata} chunks
+ */
+export function parsePdfInWorker(filePath, filename, pdfLoader) {
+  return new Promise((resolve, reject) => {
+    queue.push({ id: nextTaskId++, filePath, filename, pdfLoader, resolve, reject });
+    dispatch();
+  });
+}
+
+/**
+ * Number of parser threads available to a batch
+ */
+export function getPdfWorkerPoolSize() {
+  return POOL_SIZE;
+}
+
+/**
+ * Terminate all parser threads (pending tasks are rejected)
+ */
+export async function closePdfWorkers() {
+  const error = new Error('PDF worker pool closed');
+  queue.splice(0).forEach((task) => task.reject(error));
+  const workers = [...idleWorkers];
+  idleWorkers.length = 0;
+  for (const [worker, task] of tasks) {
+    task.reject(error);
+    workers.push(worker);
+  }
+  tasks.clear();
+  workerCount = 0;
+  await Promise.all(workers.map((worker) => worker.terminate()));
+}
+
+function dispatch() {
+  while (queue.length > 0) {
+    let worker = idleWorkers.pop();
+    if (!worker) {
+      if (workerCount >= POOL_SIZE) return;
+      worker = spawnWorker();
+    }
+
+    const task = queue.shift();
+    tasks.set(worker, task);
+    // Keep the process alive only while a worker has work
+    worker.ref();
+    worker.postMessage({
+      id: task.id,
+      filePath: task.filePath,
+      filename: task.filename,
+      pdfLoader: task.pdfLoader,
+    });
+  }
+}
+
+function spawnWorker() {
+  const worker = new Worker(WORKER_URL);
+  workerCount++;
+
+  worker.on('message', (message) => {
+    const task = tasks.get(worker);
+    tasks.delete(worker);
+    worker.unref();
+    idleWorkers.push(worker);
+
+    if (task) {
+      if (message.error) {
+        task.reject(new Error(message.error));
+      } else {
+        task.resolve(message.chunks);
+      }
+    }
+    dispatch();
+  });
+
+  worker.on('error', (error) => {
+    retireWorker(worker, error);
+  });
+
+  worker.on('exit', (code) => {
+    retireWorker(worker, new Error(`PDF worker exited with code ${code}`));
+  });
+
+  return worker;
+}
+
+function retireWorker(worker, error) {
+  const idleIndex = idleWorkers.indexOf(worker);
+  if (idleIndex !== -1) {
+    idleWorkers.splice(idleIndex, 1);
+  }
+
+  const task = tasks.get(worker);
+  // 'error' is followed by 'exit'; only the first event releases the slot
+  const tracked = task !== undefined || idleIndex !== -1;
+  tasks.delete(worker);
+  if (task) {
+    task.reject(error);
+  }
+  if (tracked) {
+    workerCount--;
+    dispatch();
+  }
+}
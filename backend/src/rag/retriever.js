@@ -5,7 +5,7 @@
 
 import { Document } from 'langchain/document';
 import { ChatPromptTemplate } from '@langchain/core/prompts';
-import { getVectorStore, getChromaClient } from './ingest.js';
+import { getVectorStore, getChromaClient, getChromaCollection, invalidateChromaCollection } from './ingest.js';
 import { ensureLLMReady, getChatModel } from '../llm/index.js';
 import { getRagConfig, getRagAdvancedConfig } from '../config.js';
 
@@ -78,16 +78,13 @@ export async function agenticRetrieve(query, options = {}) {
       console.log(`📝 Generated ${queries.length} query variants`);
     }
 
-    // Step 2: Multi-query retrieval
-    const allDocuments = [];
-    for (const q of queries) {
-      const docs = await baseRetrieve(q, initialK || MAX_RETRIEVAL_K, {
-        strategy: retrievalStrategy,
-        mmrLambda,
-        metadataFilter,
-      });
-      allDocuments.push(...docs);
-    }
+    // Step 2: Multi-query retrieval (one Chroma query for all variants)
+    const perQueryDocs = await baseRetrieveMany(queries, initialK || MAX_RETRIEVAL_K, {
+      strategy: retrievalStrategy,
+      mmrLambda,
+      metadataFilter,
+    });
+    const allDocuments = perQueryDocs.flat();
 
     // Remove duplicates
     const uniqueDocs = deduplicateDocuments(allDocuments);
@@ -165,12 +162,23 @@ export async function simpleRetrieve(query, topK = 5) {
  * Base retrieval from vector store
  */
 async function baseRetrieve(query, k, options = {}) {
+  const [docs] = await baseRetrieveMany([query], k, options);
+  return docs;
+}
+
+/**
+ * Retrieve for several queries with a single Chroma round trip.
+ * Returns one document list per query, in input order; only queries whose
+ * vector search could not run fall back to lexical retrieval.
+ */
+async function baseRetrieveMany(queries, k, options = {}) {
   const vectorStore = getVectorStore();
   if (!vectorStore) {
     throw new Error('Vector store not initialized');
   }
 
   const { metadataFilter = null } = options;
+  const results = new Array(queries.length).fill(null);
 
   try {
     const chromaClient = getChromaClient();
@@ -183,73 +191,105 @@ async function baseRetrieve(query, k, options = {}) {
       throw new Error('Vector store embeddings not available for query');
     }
 
-    const queryEmbedding = await embeddingModel.embedQuery(query);
-    const normalizedEmbedding = normalizeEmbedding(queryEmbedding);
-    if (normalizedEmbedding.length === 0) {
-      throw new Error('Failed to generate valid query embedding');
-    }
+    const settled = await Promise.allSettled(queries.map((q) => embeddingModel.embedQuery(q)));
+    const embedded = [];
+    const queryEmbeddings = [];
+    settled.forEach((outcome, index) => {
+      const embedding = outcome.status === 'fulfilled' ? normalizeEmbedding(outcome.value) : [];
+      if (embedding.length > 0) {
+        embedded.push(index);
+        queryEmbeddings.push(embedding);
+      } else {
+        logBaseRetrievalFailure(outcome.status === 'rejected'
+          ? outcome.reason
+          : new Error('Failed to generate valid query embedding'));
+      }
+    });
+
+    if (queryEmbeddings.length > 0) {
+      const collection = await getChromaCollection();
 
-    const ragConfig = getRagConfig();
-    const collectionName = ragConfig.defaultCollection || 'pdf_chunks';
-    const collection = await chromaClient.getCollection({ name: collectionName });
+      const result = await collection.query({
+        queryEmbeddings,
+        nResults: k,
+        where: metadataFilter && typeof metadataFilter === 'object' ? metadataFilter : undefined,
+        include: ['documents', 'metadatas', 'distances'],
+      });
 
-    const result = await collection.query({
-      queryEmbeddings: [normalizedEmbedding],
-      nResults: k,
-      where: metadataFilter && typeof metadataFilter === 'object' ? metadataFilter : undefined,
-      include: ['documents', 'metadatas', 'distances'],
+      embedded.forEach((queryIndex, position) => {
+        results[queryIndex] = queryResultDocuments(result, position);
+      });
+    }
+  } catch (error) {
+    invalidateChromaCollection(error);
+    logBaseRetrievalFailure(error);
+  }
+
+  const failed = [];
+  results.forEach((docs, index) => {
+    if (!docs) failed.push(index);
+  });
+  if (failed.length > 0) {
+    const fallback = await lexicalFallbackRetrieveMany(failed.map((index) => queries[index]), k, metadataFilter);
+    failed.forEach((queryIndex, position) => {
+      results[queryIndex] = fallback[position];
     });
+  }
 
-    const docs = Array.isArray(result?.documents?.[0]) ? result.documents[0] : [];
-    const metadatas = Array.isArray(result?.metadatas?.[0]) ? result.metadatas[0] : [];
+  return results;
+}
 
-    return docs.map((content, idx) => new Document({
-      pageContent: String(content || ''),
-      metadata: metadatas[idx] || {},
-    }));
-  } catch (error) {
-    const message = error?.message || '';
-    if (message.includes('e.every is not a function')) {
-      if (!loggedChromaEmbeddingBug) {
-        console.warn('⚠️ Chroma vector query failed (known embedding validation issue); using lexical fallback retrieval.');
-        loggedChromaEmbeddingBug = true;
-      }
-    } else {
-      console.error('❌ Base retrieval failed, using lexical fallback:', error);
+function queryResultDocuments(result, index) {
+  const docs = Array.isArray(result?.documents?.[index]) ? result.documents[index] : [];
+  const metadatas = Array.isArray(result?.metadatas?.[index]) ? result.metadatas[index] : [];
+
+  return docs.map((content, idx) => new Document({
+    pageContent: String(content || ''),
+    metadata: metadatas[idx] || {},
+  }));
+}
+
+function logBaseRetrievalFailure(error) {
+  const message = error?.message || '';
+  if (message.includes('e.every is not a function')) {
+    if (!loggedChromaEmbeddingBug) {
+      console.warn('⚠️ Chroma vector query failed (known embedding validation issue); using lexical fallback retrieval.');
+      loggedChromaEmbeddingBug = true;
     }
-    return await lexicalFallbackRetrieve(query, k, metadataFilter);
+  } else {
+    console.error('❌ Base retrieval failed, using lexical fallback:', error);
   }
 }
 
 function normalizeEmbedding(vector) {
-  if (ArrayBuffer.isView(vector)) {
-    return Array.from(vector).map(Number).filter((n) => Number.isFinite(n));
-  }
-  if (!Array.isArray(vector)) {
+  const base = Array.isArray(vector) && (Array.isArray(vector[0]) || ArrayBuffer.isView(vector[0]))
+    ? vector[0]
+    : vector;
+  if (!Array.isArray(base) && !ArrayBuffer.isView(base)) {
     return [];
   }
 
-  const base = Array.isArray(vector[0]) ? vector[0] : vector;
-  if (ArrayBuffer.isView(base)) {
-    return Array.from(base).map(Number).filter((n) => Number.isFinite(n));
+  // Single pass: coerce to numbers and drop non-finite values without intermediate arrays
+  const result = [];
+  for (let i = 0; i < base.length; i += 1) {
+    const n = Number(base[i]);
+    if (Number.isFinite(n)) result.push(n);
   }
-  if (!Array.isArray(base)) {
-    return [];
-  }
-
-  return base.map(Number).filter((n) => Number.isFinite(n));
+  return result;
 }
 
-async function lexicalFallbackRetrieve(query, k, metadataFilter = null) {
+/**
+ * Token-overlap retrieval over the whole collection, for queries whose vector search failed.
+ * The collection is fetched and tokenized once for all queries.
+ */
+async function lexicalFallbackRetrieveMany(queries, k, metadataFilter = null) {
   try {
     const chromaClient = getChromaClient();
     if (!chromaClient) {
-      return [];
+      return queries.map(() => []);
     }
 
-    const ragConfig = getRagConfig();
-    const collectionName = ragConfig.defaultCollection || 'pdf_chunks';
-    const collection = await chromaClient.getCollection({ name: collectionName });
+    const collection = await getChromaCollection();
 
     const where = metadataFilter && typeof metadataFilter === 'object' ? metadataFilter : undefined;
     const data = await collection.get({
@@ -260,37 +300,57 @@ async function lexicalFallbackRetrieve(query, k, metadataFilter = null) {
     const docs = Array.isArray(data.documents) ? data.documents : [];
     const metadatas = Array.isArray(data.metadatas) ? data.metadatas : [];
     if (docs.length === 0) {
-      return [];
+      return queries.map(() => []);
     }
 
-    const queryTokens = new Set(tokenize(query));
-    const scored = docs
-      .map((content, idx) => {
-        const tokens = tokenize(content || '');
+    const queryTokens = queries.map((query) => new Set(tokenize(query)));
+    const scores = queries.map(() => new Float64Array(docs.length));
+    docs.forEach((content, idx) => {
+      const tokens = tokenize(content || '');
+      queryTokens.forEach((tokenSet, queryIndex) => {
+        if (tokenSet.size === 0) return;
         let overlap = 0;
         for (const token of tokens) {
-          if (queryTokens.has(token)) overlap += 1;
+          if (tokenSet.has(token)) overlap += 1;
         }
-        const norm = queryTokens.size > 0 ? overlap / queryTokens.size : 0;
-        return {
-          score: norm,
-          doc: new Document({
-            pageContent: content || '',
-            metadata: metadatas[idx] || {},
-          }),
-        };
-      })
-      .sort((a, b) => b.score - a.score)
-      .slice(0, k)
-      .map((item) => item.doc);
+        scores[queryIndex][idx] = overlap / tokenSet.size;
+      });
+    });
 
-    return scored;
+    // Only the selected top-k become Document instances
+    return scores.map((queryScores) => topKIndices(queryScores, k)
+      .map((idx) => new Document({
+        pageContent: docs[idx] || '',
+        metadata: metadatas[idx] || {},
+      })));
   } catch (error) {
+    invalidateChromaCollection(error);
     console.error('❌ Lexical fallback retrieval failed:', error);
-    return [];
+    return queries.map(() => []);
   }
 }
 
+/**
+ * Indices of the k highest scores, best first; ties keep input order.
+ * Partial selection: O(N·k) with small k instead of sorting all N.
+ */
+function topKIndices(scores, k) {
+  const top = [];
+  if (k <= 0) return top;
+
+  for (let idx = 0; idx < scores.length; idx += 1) {
+    const score = scores[idx];
+    if (top.length === k && score <= scores[top[k - 1]]) continue;
+
+    let pos = top.length;
+    while (pos > 0 && scores[top[pos - 1]] < score) pos -= 1;
+    top.splice(pos, 0, idx);
+    if (top.length > k) top.pop();
+  }
+
+  return top;
+}
+
 function tokenize(text) {
   return String(text)
     .toLowerCase()
@@ -318,10 +378,17 @@ Return only the alternative questions, one per line, without numbering or bullet
     ]);
 
     const response = await llm.invoke(await prompt.format({ input: originalQuery }));
+    // Drop echoes of the original and repeated phrasings so each variant costs one embedding
+    const seen = new Set([queryKey(originalQuery)]);
     const alternatives = response.content.toString()
       .split('\n')
       .map(q => q.trim())
-      .filter(q => q.length > 0)
+      .filter((q) => {
+        const key = queryKey(q);
+        if (!key || seen.has(key)) return false;
+        seen.add(key);
+        return true;
+      })
       .slice(0, maxQueries - 1);
 
     return [originalQuery, ...alternatives];
@@ -331,6 +398,14 @@ Return only the alternative questions, one per line, without numbering or bullet
   }
 }
 
+function queryKey(query) {
+  return String(query)
+    .toLowerCase()
+    .replace(/\s+/g, ' ')
+    .replace(/[\s?.!]+$/, '')
+    .trim();
+}
+
 /**
  * Contextual compression using relevance filtering
  */
@@ -341,8 +416,8 @@ async function compressDocuments(query, documents) {
     
     for (const doc of documents) {
       // Calculate relevance score based on keyword overlap
-      const docTokens = doc.pageContent.toLowerCase().split(/\s+/);
-      const relevanceScore = queryTokens.filter(token => docTokens.includes(token)).length / queryTokens.length;
+      const docTokens = new Set(doc.pageContent.toLowerCase().split(/\s+/));
+      const relevanceScore = queryTokens.filter(token => docTokens.has(token)).length / queryTokens.length;
       
       if (relevanceScore > 0.1) { // Keep documents with some relevance
         // Smart truncation: keep beginning and end of important documents
@@ -435,3 +510,10 @@ export async function getRetrieverStatus() {
     llmAvailable: true,
   };
 }
+
+export const __test__ = {
+  baseRetrieveMany,
+  topKIndices,
+  normalizeEmbedding,
+  queryKey,
+};
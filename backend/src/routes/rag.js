@@ -15,6 +15,14 @@ if (!fs.existsSync(pdfDir)) {
   fs.mkdirSync(pdfDir, { recursive: true });
 }
 const upload = multer({ dest: pdfDir });
+const MAX_BATCH_FILES = 20;
+
+function toIngestFile(file) {
+  return {
+    filePath: file.path,
+    filename: file.originalname || 'unknown.pdf',
+  };
+}
 
 const documentQuerySchema = z.object({
   query: z.string().min(1).max(10_000),
@@ -28,7 +36,8 @@ router.post('/ingest', upload.single('pdf'), async (req, res) => {
       return res.status(400).json({ error: 'No PDF uploaded', requestId: req.requestId });
     }
 
-    const result = await ragService.processPDF(req.file.path, req.file.originalname || 'unknown.pdf');
+    const { filePath, filename } = toIngestFile(req.file);
+    const result = await ragService.processPDF(filePath, filename);
     if (!result.success) {
       return res.status(500).json({
         error: 'Failed to process PDF',
@@ -39,7 +48,7 @@ router.post('/ingest', upload.single('pdf'), async (req, res) => {
 
     return res.json({
       status: 'success',
-      documentId: req.file.originalname || 'unknown.pdf',
+      documentId: filename,
       chunks: result.chunks,
       requestId: req.requestId,
     });
@@ -52,6 +61,37 @@ router.post('/ingest', upload.single('pdf'), async (req, res) => {
   }
 });
 
+router.post('/ingest/batch', upload.array('pdfs', MAX_BATCH_FILES), async (req, res) => {
+  try {
+    const files = Array.isArray(req.files) ? req.files : [];
+    if (files.length === 0) {
+      return res.status(400).json({ error: 'No PDFs uploaded', requestId: req.requestId });
+    }
+
+    const results = await ragService.processPDFs(files.map(toIngestFile));
+    const succeeded = results.filter((result) => result.success).length;
+    const status = succeeded === results.length ? 'success' : succeeded > 0 ? 'partial' : 'failed';
+
+    // 200 all stored, 207 some files failed, 500 none stored
+    return res.status(status === 'success' ? 200 : status === 'partial' ? 207 : 500).json({
+      status,
+      documents: results.map((result) => ({
+        documentId: result.filename,
+        success: result.success,
+        chunks: result.chunks,
+        ...(result.error ? { error: result.error } : {}),
+      })),
+      requestId: req.requestId,
+    });
+  } catch (error) {
+    return res.status(500).json({
+      error: 'Failed to ingest documents',
+      details: error.message,
+      requestId: req.requestId,
+    });
+  }
+});
+
 router.get('/documents', async (req, res) => {
   try {
     const documents = await ragService.listDocuments();
@@ -45,10 +45,18 @@ var __spreadArray = (this && this.__spreadArray) || function (to, from, pack) {
     return to.concat(ar || Array.prototype.slice.call(from));
 };
 Object.defineProperty(exports, "__esModule", { value: true });
+var readline_1 = require("readline");
 var chromadb_1 = require("chromadb");
+var sharedClient = null;
 var getClient = function (params) {
     // The default host is 'localhost' and port is 8000, which matches the python script.
-    return new chromadb_1.ChromaClient(params);
+    if (params) {
+        return new chromadb_1.ChromaClient(params);
+    }
+    if (!sharedClient) {
+        sharedClient = new chromadb_1.ChromaClient();
+    }
+    return sharedClient;
 };
 var createCollection = function (collectionName, metadata) { return __awaiter(void 0, void 0, void 0, function () {
     var client, existingCollections, e_1;
@@ -210,6 +218,52 @@ var main = function () { return __awaiter(void 0, void 0, void 0, function () {
         }
     });
 }); };
+var dispatch = function (request) {
+    switch (request.command) {
+        case "create_collection":
+            return createCollection(request.collection_name, request.metadata);
+        case "add_documents":
+            return addDocuments(request.collection_name, request.documents, request.metadatas, request.ids, request.embeddings);
+        case "query":
+            return queryCollection(request.collection_name, request.query_embeddings, request.n_results);
+        case "list_collections":
+            return listCollections();
+        default:
+            return Promise.resolve({ success: false, error: "Unknown command: ".concat(request.command) });
+    }
+};
+// Long-lived mode: one JSON request per stdin line, one JSON response per stdout line.
+// Requests are handled in order and share a single Chroma client.
+var serve = function () {
+    var queue = Promise.resolve();
+    var rl = readline_1.createInterface({ input: process.stdin, terminal: false });
+    rl.on("line", function (line) {
+        if (!line.trim()) {
+            return;
+        }
+        queue = queue.then(function () {
+            var request;
+            try {
+                request = JSON.parse(line);
+            }
+            catch (e) {
+                return { success: false, error: "Invalid JSON: ".concat(e.message) };
+            }
+            return dispatch(request).then(function (result) {
+                return request.id !== undefined ? Object.assign({ id: request.id }, result) : result;
+            });
+        }).catch(function (e) {
+            return { success: false, error: e.message };
+        }).then(function (result) {
+            process.stdout.write(JSON.stringify(result) + "\n");
+        });
+    });
+};
 if (require.main === module) {
-    main();
+    if (process.argv[2] === "serve") {
+        serve();
+    }
+    else {
+        main();
+    }
 }
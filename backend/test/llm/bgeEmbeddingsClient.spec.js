@@ -0,0 +1,97 @@
+import sinon from 'sinon';
+import { BgeEmbeddingsClient } from '../../src/llm/bgeEmbeddingsClient.js';
+
+describe('BgeEmbeddingsClient', () => {
+  let client;
+  let embedStub;
+
+  beforeEach(() => {
+    client = new BgeEmbeddingsClient();
+    embedStub = sinon.stub(client, 'embed').callsFake(async (texts) => ({
+      embeddings: texts.map((text) => [text.length, 1]),
+      dimensions: 2,
+      processing_time: 0,
+    }));
+  });
+
+  afterEach(() => {
+    sinon.restore();
+  });
+
+  describe('embedQuery', () => {
+    it('serves repeated queries from the cache', async () => {
+      const first = await client.embedQuery('hello world');
+      const second = await client.embedQuery('hello world');
+
+      expect(first).toEqual([11, 1]);
+      expect(second).toEqual([11, 1]);
+      expect(embedStub.calledOnce).toBe(true);
+      expect(client.getQueryCacheInfo()).toEqual(jasmine.objectContaining({ hits: 1, misses: 1, coalesced: 0, size: 1 }));
+    });
+
+    it('shares one embedding call between concurrent identical queries', async () => {
+      const [first, second] = await Promise.all([
+        client.embedQuery('same question'),
+        client.embedQuery('same question'),
+      ]);
+
+      expect(first).toEqual([13, 1]);
+      expect(second).toEqual([13, 1]);
+      expect(first).not.toBe(second);
+      expect(embedStub.calledOnce).toBe(true);
+      expect(client.getQueryCacheInfo()).toEqual(jasmine.objectContaining({ hits: 0, misses: 1, coalesced: 1 }));
+    });
+
+    it('merges concurrent distinct queries into one embedding call', async () => {
+      const [first, second] = await Promise.all([
+        client.embedQuery('first'),
+        client.embedQuery('second one'),
+      ]);
+
+      expect(first).toEqual([5, 1]);
+      expect(second).toEqual([10, 1]);
+      expect(embedStub.calledOnceWith(['first', 'second one'], true)).toBe(true);
+    });
+
+    it('returns copies so callers cannot mutate cached vectors', async () => {
+      const first = await client.embedQuery('query');
+      first[0] = 999;
+
+      const second = await client.embedQuery('query');
+      expect(second[0]).toBe(5);
+    });
+
+    it('keys long texts by hash and separates normalized results', async () => {
+      const longText = 'x'.repeat(1000);
+      await client.embedQuery(longText, true);
+      await client.embedQuery(longText, false);
+
+      expect(embedStub.calledTwice).toBe(true);
+      expect(client.getQueryCacheInfo().size).toBe(2);
+    });
+  });
+
+  describe('batchEmbed', () => {
+    it('embeds length-sorted micro-batches and restores input order', async () => {
+      const texts = ['a', 'ccc', 'bb', 'dddd', 'e'];
+
+      const result = await client.batchEmbed(texts, 2);
+
+      expect(result.batches_processed).toBe(3);
+      expect(result.embeddings.map((vector) => vector[0])).toEqual([1, 3, 2, 4, 1]);
+      expect(embedStub.firstCall.args[0]).toEqual(['dddd', 'ccc']);
+    });
+
+    it('splits long texts into smaller batches to bound padding', async () => {
+      const longTexts = Array.from({ length: 20 }, (_, index) => `${index}`.padEnd(4000, 'x'));
+      const texts = [...longTexts, 'short one', 'short two'];
+
+      const result = await client.batchEmbed(texts, 32);
+
+      expect(result.batches_processed).toBe(2);
+      expect(embedStub.firstCall.args[0].length).toBe(16);
+      expect(result.embeddings.length).toBe(texts.length);
+      expect(result.embeddings[20]).toEqual([9, 1]);
+    });
+  });
+});
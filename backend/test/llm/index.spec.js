@@ -0,0 +1,19 @@
+import { getChatModelForProvider } from '../../src/llm/index.js';
+
+describe('LLM factory', () => {
+  describe('getChatModelForProvider', () => {
+    it('reuses the instance for the same provider, model and temperature', () => {
+      const first = getChatModelForProvider('ollama', { model: 'llama3.2', temperature: 0.1 });
+      const second = getChatModelForProvider('ollama', { model: 'llama3.2', temperature: 0.1 });
+
+      expect(second).toBe(first);
+    });
+
+    it('builds separate instances for different settings', () => {
+      const cold = getChatModelForProvider('ollama', { model: 'llama3.2', temperature: 0 });
+      const warm = getChatModelForProvider('ollama', { model: 'llama3.2', temperature: 0.7 });
+
+      expect(warm).not.toBe(cold);
+    });
+  });
+});
@@ -1,6 +1,13 @@
 import sinon from 'sinon';
 import ragService from '../../src/rag/index.js';
-import { __test__ } from '../../src/rag/ingest.js';
+import path from 'path';
+import { fileURLToPath } from 'url';
+import { __test__, getChromaCollection, invalidateChromaCollection } from '../../src/rag/ingest.js';
+import { closePdfWorkers } from '../../src/rag/pdfWorkerPool.js';
+import { loadPdfChunks } from '../../src/rag/pdfChunks.js';
+import { getRagConfig } from '../../src/config.js';
+
+const samplePdf = path.join(path.dirname(fileURLToPath(import.meta.url)), '../data/05-versions-space.pdf');
 
 describe('RAG Service', () => {
   let fsMock, chromaClientMock, pdfParseMock, collectionMock;
@@ -47,6 +54,7 @@ describe('RAG Service', () => {
     __test__.setFs(fsMock);
     __test__.setChromaClientClass(ChromaClientClassMock);
     __test__.setPdf(pdfParseMock);
+    __test__.setPdfWorkers(false);
     
     // Mock vectorStore to avoid initialization issues during tests
     const vectorStoreMock = {
@@ -84,6 +92,22 @@ describe('RAG Service', () => {
       expect(vectorStore.addDocuments.called).toBe(true);
     });
 
+    it('should parse with the configured pdf.js build', async () => {
+      await ragService.processPDF('/fake/path/doc.pdf', 'doc.pdf');
+
+      expect(pdfParseMock.firstCall.args[1]).toEqual({ version: getRagConfig().pdfLoader });
+    });
+
+    it('should pass an explicit pdf.js build through to pdf-parse', async () => {
+      await loadPdfChunks('/fake/path/doc.pdf', 'doc.pdf', {
+        fsModule: fsMock,
+        pdfModule: pdfParseMock,
+        pdfLoader: 'v2.0.550',
+      });
+
+      expect(pdfParseMock.calledOnceWith(sinon.match.any, { version: 'v2.0.550' })).toBe(true);
+    });
+
     it('should handle PDF processing failure', async () => {
       fsMock.readFile.rejects(new Error('File not found'));
 
@@ -104,6 +128,230 @@ describe('RAG Service', () => {
     });
   });
 
+  describe('processPDFs', () => {
+    it('should ingest several PDFs with a single vector store write', async () => {
+      const result = await ragService.processPDFs([
+        { filePath: '/fake/path/a.pdf', filename: 'a.pdf' },
+        { filePath: '/fake/path/b.pdf', filename: 'b.pdf' },
+      ]);
+
+      expect(result.length).toBe(2);
+      expect(result.every((item) => item.success)).toBe(true);
+      expect(pdfParseMock.calledTwice).toBe(true);
+      const vectorStore = __test__.getVectorStore();
+      expect(vectorStore.addDocuments.calledOnce).toBe(true);
+    });
+
+    it('should parse PDFs on worker threads when enabled', async () => {
+      __test__.setPdfWorkers(true);
+
+      try {
+        const result = await ragService.processPDFs([
+          { filePath: samplePdf, filename: 'versions.pdf' },
+          { filePath: '/fake/path/missing.pdf', filename: 'missing.pdf' },
+        ]);
+
+        expect(result[0].success).toBe(true);
+        expect(result[0].chunks).toBeGreaterThan(0);
+        expect(result[1].success).toBe(false);
+        expect(pdfParseMock.called).toBe(false);
+        const chunks = __test__.getVectorStore().addDocuments.firstCall.args[0];
+        expect(chunks[0].pageContent.length).toBeGreaterThan(0);
+        expect(chunks[0].metadata.filename).toBe('versions.pdf');
+      } finally {
+        await closePdfWorkers();
+      }
+    });
+
+    it('should reject repeated filenames before writing the batch', async () => {
+      const result = await ragService.processPDFs([
+        { filePath: '/fake/path/upload-1', filename: 'report.pdf' },
+        { filePath: '/fake/path/upload-2', filename: 'report.pdf' },
+        { filePath: '/fake/path/upload-3', filename: 'other.pdf' },
+      ]);
+
+      expect(result.map((item) => item.success)).toEqual([true, false, true]);
+      expect(result[1].error).toBe('Duplicate filename in batch');
+      expect(pdfParseMock.calledTwice).toBe(true);
+      const chunks = __test__.getVectorStore().addDocuments.firstCall.args[0];
+      const reportIndexes = chunks
+        .filter((chunk) => chunk.metadata.filename === 'report.pdf')
+        .map((chunk) => chunk.metadata.chunkIndex);
+      expect(new Set(reportIndexes).size).toBe(reportIndexes.length);
+    });
+
+    it('should split the store write by the Chroma max batch size', async () => {
+      chromaClientMock.getMaxBatchSize = sinon.stub().resolves(1);
+      __test__.setChromaClient(chromaClientMock);
+      const embeddingsMock = {
+        embedDocuments: sinon.stub().callsFake(async (texts) => texts.map(() => [0.1, 0.2])),
+      };
+      __test__.setVectorStore(__test__.createVectorStore(embeddingsMock, 'test'));
+
+      const result = await ragService.processPDFs([
+        { filePath: '/fake/path/a.pdf', filename: 'a.pdf' },
+        { filePath: '/fake/path/b.pdf', filename: 'b.pdf' },
+        { filePath: '/fake/path/c.pdf', filename: 'c.pdf' },
+      ]);
+
+      expect(result.every((item) => item.success)).toBe(true);
+      expect(collectionMock.upsert.callCount).toBe(3);
+      collectionMock.upsert.getCalls().forEach((call) => {
+        expect(call.args[0].ids.length).toBe(1);
+      });
+      expect(chromaClientMock.getMaxBatchSize.calledOnce).toBe(true);
+    });
+
+    it('should report per-file failures without dropping other files', async () => {
+      fsMock.readFile.withArgs('/fake/path/missing.pdf').rejects(new Error('File not found'));
+
+      const result = await ragService.processPDFs([
+        { filePath: '/fake/path/missing.pdf', filename: 'missing.pdf' },
+        { filePath: '/fake/path/ok.pdf', filename: 'ok.pdf' },
+      ]);
+
+      expect(result[0].success).toBe(false);
+      expect(result[0].error).toBe('File not found');
+      expect(result[1].success).toBe(true);
+    });
+  });
+
+  describe('getChromaCollection', () => {
+    it('should resolve the collection handle only once', async () => {
+      __test__.setChromaClient(chromaClientMock);
+
+      const first = await getChromaCollection();
+      const second = await getChromaCollection();
+
+      expect(first).toBe(collectionMock);
+      expect(second).toBe(collectionMock);
+      expect(chromaClientMock.getOrCreateCollection.calledOnce).toBe(true);
+    });
+
+    it('should retry after a failed lookup', async () => {
+      chromaClientMock.getOrCreateCollection.onFirstCall().rejects(new Error('Chroma unavailable'));
+      __test__.setChromaClient(chromaClientMock);
+
+      await expectAsync(getChromaCollection()).toBeRejectedWithError('Chroma unavailable');
+      expect(await getChromaCollection()).toBe(collectionMock);
+    });
+
+    it('should apply search_ef to an already existing collection', async () => {
+      __test__.setChromaClient(chromaClientMock);
+
+      await getChromaCollection();
+
+      const searchEf = getRagConfig().hnswSearchEf;
+      expect(collectionMock.modify.calledOnceWith({ configuration: { hnsw: { ef_search: searchEf } } })).toBe(true);
+    });
+
+    it('should skip the modify call when search_ef already matches', async () => {
+      collectionMock.configuration = { hnsw: { ef_search: getRagConfig().hnswSearchEf } };
+      __test__.setChromaClient(chromaClientMock);
+
+      await getChromaCollection();
+
+      expect(collectionMock.modify.called).toBe(false);
+    });
+
+    it('should re-resolve the collection after it is reported missing', async () => {
+      __test__.setChromaClient(chromaClientMock);
+      await getChromaCollection();
+
+      invalidateChromaCollection(new Error('Collection pdf_chunks does not exist.'));
+      await getChromaCollection();
+      invalidateChromaCollection(new Error('Chroma unavailable'));
+      await getChromaCollection();
+
+      expect(chromaClientMock.getOrCreateCollection.calledTwice).toBe(true);
+    });
+  });
+
+  describe('embedWithReuse', () => {
+    it('should only embed chunks without a stored vector', async () => {
+      collectionMock.get.resolves({
+        documents: ['unchanged chunk'],
+        metadatas: [{ contentHash: 'h1' }],
+        embeddings: [[0.1, 0.2]],
+      });
+      const embeddingsMock = { embedDocuments: sinon.stub().resolves([[0.3, 0.4]]) };
+
+      const vectors = await __test__.embedWithReuse(
+        collectionMock,
+        embeddingsMock,
+        ['unchanged chunk', 'new chunk'],
+        [{ contentHash: 'h1' }, { contentHash: 'h2' }],
+        'microservice:q4',
+      );
+
+      expect(vectors).toEqual([[0.1, 0.2], [0.3, 0.4]]);
+      expect(embeddingsMock.embedDocuments.calledOnceWith(['new chunk'])).toBe(true);
+    });
+
+    it('should embed everything when the lookup fails', async () => {
+      collectionMock.get.rejects(new Error('Chroma unavailable'));
+      const embeddingsMock = { embedDocuments: sinon.stub().resolves([[1], [2]]) };
+
+      const vectors = await __test__.embedWithReuse(
+        collectionMock,
+        embeddingsMock,
+        ['a', 'b'],
+        [{ contentHash: 'ha' }, { contentHash: 'hb' }],
+        'fallback',
+      );
+
+      expect(vectors).toEqual([[1], [2]]);
+    });
+  });
+
+  describe('addDocuments', () => {
+    it('should upsert a re-ingested file under the same chunk ids', async () => {
+      __test__.setChromaClient(chromaClientMock);
+      const embeddingsMock = {
+        embedDocuments: sinon.stub().callsFake(async (texts) => texts.map(() => [0.1, 0.2])),
+      };
+      __test__.setVectorStore(__test__.createVectorStore(embeddingsMock, 'test'));
+      const clock = sinon.useFakeTimers({ now: 1000, toFake: ['Date'] });
+
+      try {
+        await ragService.processPDF('/fake/path/upload-1', 'doc.pdf');
+        clock.tick(60000);
+        await ragService.processPDF('/fake/path/upload-2', 'doc.pdf');
+      } finally {
+        clock.restore();
+      }
+
+      expect(collectionMock.upsert.calledTwice).toBe(true);
+      const firstIds = collectionMock.upsert.firstCall.args[0].ids;
+      const secondIds = collectionMock.upsert.secondCall.args[0].ids;
+      expect(firstIds.length).toBeGreaterThan(0);
+      expect(secondIds).toEqual(firstIds);
+      expect(firstIds[0]).toMatch(/^doc-pdf-[0-9a-f]+-0$/);
+    });
+  });
+
+  describe('removeStaleChunks', () => {
+    it('should delete chunks of re-ingested files that were not rewritten', async () => {
+      collectionMock.get.resolves({ ids: ['doc-1-0', 'doc-1-1', 'doc-1-2'] });
+
+      await __test__.removeStaleChunks(
+        collectionMock,
+        [{ metadata: { filename: 'doc.pdf' } }],
+        ['doc-1-0'],
+      );
+
+      expect(collectionMock.delete.calledOnceWith({ ids: ['doc-1-1', 'doc-1-2'] })).toBe(true);
+    });
+
+    it('should leave the collection alone when nothing is stale', async () => {
+      collectionMock.get.resolves({ ids: ['doc-1-0'] });
+
+      await __test__.removeStaleChunks(collectionMock, [{ metadata: { filename: 'doc.pdf' } }], ['doc-1-0']);
+
+      expect(collectionMock.delete.called).toBe(false);
+    });
+  });
+
   describe('searchRelevantChunks', () => {
     it('should search for relevant chunks successfully', async () => {
       const query = 'test query';
@@ -0,0 +1,93 @@
+import sinon from 'sinon';
+import { __test__ } from '../../src/rag/retriever.js';
+import { __test__ as ingestTest } from '../../src/rag/ingest.js';
+
+describe('RAG Retriever', () => {
+  describe('topKIndices', () => {
+    it('returns the k best indices, highest score first', () => {
+      const scores = Float64Array.from([0.1, 0.9, 0.5, 0.7, 0.3]);
+
+      expect(__test__.topKIndices(scores, 3)).toEqual([1, 3, 2]);
+    });
+
+    it('keeps input order for tied scores', () => {
+      const scores = Float64Array.from([0.5, 1, 0.5, 1, 0.5]);
+
+      expect(__test__.topKIndices(scores, 4)).toEqual([1, 3, 0, 2]);
+    });
+
+    it('handles k larger than the input and k of zero', () => {
+      const scores = Float64Array.from([0.2, 0.4]);
+
+      expect(__test__.topKIndices(scores, 10)).toEqual([1, 0]);
+      expect(__test__.topKIndices(scores, 0)).toEqual([]);
+    });
+  });
+
+  describe('normalizeEmbedding', () => {
+    it('accepts plain arrays, typed arrays and single-row matrices', () => {
+      expect(__test__.normalizeEmbedding([0.5, '1', 2])).toEqual([0.5, 1, 2]);
+      expect(__test__.normalizeEmbedding(Float32Array.from([0.5, 1]))).toEqual([0.5, 1]);
+      expect(__test__.normalizeEmbedding([Float32Array.from([0.25])])).toEqual([0.25]);
+      expect(__test__.normalizeEmbedding([[3, 4]])).toEqual([3, 4]);
+    });
+
+    it('drops non-finite values and rejects non-vectors', () => {
+      expect(__test__.normalizeEmbedding([1, NaN, Infinity, 'x', 2])).toEqual([1, 2]);
+      expect(__test__.normalizeEmbedding(null)).toEqual([]);
+      expect(__test__.normalizeEmbedding('abc')).toEqual([]);
+    });
+  });
+
+  describe('queryKey', () => {
+    it('treats case, spacing and trailing punctuation variants as the same query', () => {
+      expect(__test__.queryKey('What is  the Roadmap?')).toBe(__test__.queryKey('what is the roadmap'));
+      expect(__test__.queryKey('  ?  ')).toBe('');
+    });
+  });
+
+  describe('baseRetrieveMany', () => {
+    let collectionMock, embedQuery;
+
+    beforeEach(() => {
+      collectionMock = {
+        query: sinon.stub().callsFake(async ({ queryEmbeddings }) => ({
+          documents: queryEmbeddings.map((embedding) => [`vector ${embedding[0]}`]),
+          metadatas: queryEmbeddings.map(() => [{}]),
+        })),
+        get: sinon.stub().resolves({
+          documents: ['apple banana', 'cherry pie', 'banana split'],
+          metadatas: [{ id: 1 }, { id: 2 }, { id: 3 }],
+        }),
+      };
+      embedQuery = sinon.stub().callsFake(async (query) => [query.length]);
+      ingestTest.setChromaClient({ getOrCreateCollection: sinon.stub().resolves(collectionMock) });
+      ingestTest.setVectorStore({ embeddings: { embedQuery } });
+    });
+
+    afterEach(() => {
+      sinon.restore();
+    });
+
+    it('queries every embedded variant in one round trip', async () => {
+      const results = await __test__.baseRetrieveMany(['abc', 'abcde'], 2);
+
+      expect(results.map((docs) => docs[0].pageContent)).toEqual(['vector 3', 'vector 5']);
+      expect(collectionMock.query.calledOnce).toBe(true);
+      expect(collectionMock.get.called).toBe(false);
+    });
+
+    it('falls back lexically only for variants whose embedding failed', async () => {
+      embedQuery.withArgs('banana split').rejects(new Error('embed failed'));
+      embedQuery.withArgs('cherry').resolves([]);
+
+      const results = await __test__.baseRetrieveMany(['abc', 'banana split', 'cherry'], 1);
+
+      expect(results[0][0].pageContent).toBe('vector 3');
+      expect(results[1][0].pageContent).toBe('banana split');
+      expect(results[2][0].pageContent).toBe('cherry pie');
+      expect(collectionMock.query.firstCall.args[0].queryEmbeddings).toEqual([[3]]);
+      expect(collectionMock.get.calledOnce).toBe(true);
+    });
+  });
+});
@@ -0,0 +1,95 @@
+import express from 'express';
+import request from 'supertest';
+import sinon from 'sinon';
+import ragRouter from '../../src/routes/rag.js';
+import ragService from '../../src/rag/index.js';
+
+const app = express();
+app.use(express.json());
+app.use('/api/rag', ragRouter);
+let server;
+
+beforeAll((done) => {
+  server = app.listen(0, done);
+});
+
+afterAll((done) => {
+  if (server) {
+    server.close(done);
+    return;
+  }
+  done();
+});
+
+describe('RAG Routes', () => {
+  describe('POST /api/rag/ingest/batch', () => {
+    let processStub;
+
+    beforeEach(() => {
+      processStub = sinon.stub(ragService, 'processPDFs');
+    });
+
+    afterEach(() => {
+      sinon.restore();
+    });
+
+    function uploadTwo() {
+      return request(server)
+        .post('/api/rag/ingest/batch')
+        .attach('pdfs', Buffer.from('%PDF-1.4 a'), 'a.pdf')
+        .attach('pdfs', Buffer.from('%PDF-1.4 b'), 'b.pdf');
+    }
+
+    it('rejects a request without files', async () => {
+      const response = await request(server).post('/api/rag/ingest/batch');
+
+      expect(response.status).toBe(400);
+      expect(response.body.error).toBe('No PDFs uploaded');
+      expect(processStub.called).toBe(false);
+    });
+
+    it('returns 200 when every file is stored', async () => {
+      processStub.resolves([
+        { filename: 'a.pdf', success: true, chunks: 3 },
+        { filename: 'b.pdf', success: true, chunks: 2 },
+      ]);
+
+      const response = await uploadTwo();
+
+      expect(response.status).toBe(200);
+      expect(response.body.status).toBe('success');
+      expect(response.body.documents.map((doc) => doc.documentId)).toEqual(['a.pdf', 'b.pdf']);
+      expect(processStub.firstCall.args[0].map((file) => file.filename)).toEqual(['a.pdf', 'b.pdf']);
+    });
+
+    it('returns 207 with per-file errors when some files fail', async () => {
+      processStub.resolves([
+        { filename: 'a.pdf', success: true, chunks: 3 },
+        { filename: 'b.pdf', success: false, chunks: 0, error: 'No text content found in PDF' },
+      ]);
+
+      const response = await uploadTwo();
+
+      expect(response.status).toBe(207);
+      expect(response.body.status).toBe('partial');
+      expect(response.body.documents[1]).toEqual({
+        documentId: 'b.pdf',
+        success: false,
+        chunks: 0,
+        error: 'No text content found in PDF',
+      });
+    });
+
+    it('returns 500 when no file is stored', async () => {
+      processStub.resolves([
+        { filename: 'a.pdf', success: false, chunks: 0, error: 'Chroma unavailable' },
+        { filename: 'b.pdf', success: false, chunks: 0, error: 'Chroma unavailable' },
+      ]);
+
+      const response = await uploadTwo();
+
+      expect(response.status).toBe(500);
+      expect(response.body.status).toBe('failed');
+    });
+  });
+});
@@ -0,0 +1,35 @@
+import { spawn } from 'child_process';
+import path from 'path';
+import { fileURLToPath } from 'url';
+
+const scriptPath = path.join(path.dirname(fileURLToPath(import.meta.url)), '../../src/scripts/chromaClient.cjs');
+
+function runServe(lines) {
+  return new Promise((resolve, reject) => {
+    const child = spawn(process.execPath, [scriptPath, 'serve'], { stdio: ['pipe', 'pipe', 'pipe'] });
+    let stdout = '';
+    let stderr = '';
+    child.stdout.on('data', (data) => { stdout += data; });
+    child.stderr.on('data', (data) => { stderr += data; });
+    child.on('error', reject);
+    child.on('close', (code) => resolve({ code, stderr, responses: stdout.trim().split('\n').filter(Boolean).map((line) => JSON.parse(line)) }));
+    child.stdin.end(lines.join('\n') + '\n');
+  });
+}
+
+describe('chromaClient.cjs serve mode', () => {
+  it('answers one NDJSON response per request line, in order', async () => {
+    const result = await runServe([
+      JSON.stringify({ id: 1, command: 'unknown_command' }),
+      'not json',
+      JSON.stringify({ id: 2, command: 'another_unknown' }),
+    ]);
+
+    expect(result.code).toBe(0);
+    expect(result.responses.length).toBe(3);
+    expect(result.responses[0]).toEqual({ id: 1, success: false, error: 'Unknown command: unknown_command' });
+    expect(result.responses[1].success).toBe(false);
+    expect(result.responses[1].error).toContain('Invalid JSON');
+    expect(result.responses[2].id).toBe(2);
+  });
+});